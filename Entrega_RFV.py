@@ -1,8 +1,8 @@
 # Importa as bibliotecas necessárias
 # Este script realiza a segmentação de clientes utilizando o modelo RFV (Recência, Frequência e Valor) em uma aplicação Streamlit. O objetivo é permitir o upload de um arquivo de compras, calcular os indicadores RFV para cada cliente e exibir os resultados de forma interativa.
 # Funções principais:
-# - recencia_class(x, r, q_dict): Classifica a recência de um cliente em quartis ('A', 'B', 'C', 'D'), onde 'A' representa os clientes mais recentes.
-# - frequencia_class(x, f, q_dict): Classifica a frequência ou valor de um cliente em quartis ('A', 'B', 'C', 'D'), onde 'A' representa os clientes mais frequentes ou de maior valor.
+# - classifica_quartis(valores, quartis, inverte): Classifica os valores de uma coluna em quartis de forma vetorizada, usando busca binária sobre os limites dos quartis e gerando diretamente os códigos das categorias.
+# - calcula_rfv(file_bytes, nome_arquivo): Calcula a tabela RFV do arquivo enviado, com cache em memória e em disco (parquet); CSVs grandes são agregados pelo Polars, quando instalado.
 # - main(): Configura a página do Streamlit, definindo título, layout e ícone.
 # Fluxo do script:
 # 1. Configura a interface do Streamlit, incluindo título, imagem centralizada e instruções na barra lateral.
@@ -21,15 +21,49 @@
 # - 'ValorTotal': Valor monetário da compra (usado para somar o valor total gasto por cliente).
 # O script é indicado para análises de segmentação de clientes em projetos de marketing, CRM ou ciência de dados, facilitando a identificação de grupos de clientes com diferentes perfis de comportamento de compra.
 
+import hashlib
+import os
+import tempfile
 import numpy as np
 import pandas as pd
-from datetime import datetime
 import streamlit as st
 
 from io import BytesIO
+from pathlib import Path
 
+# O Polars é opcional (não consta em requirements.txt): sem ele, arquivos grandes
+# seguem pelo caminho do pandas
+try:
+    import polars as pl
+except ImportError:
+    pl = None
 
+# Pasta onde as tabelas RFV já calculadas são guardadas, identificadas pelo hash do arquivo
+PASTA_CACHE_RFV = Path(".rfv_cache")
+
+# Versão do cálculo RFV gravada no nome dos arquivos de cache; deve ser incrementada
+# sempre que a tabela gerada mudar, para não reaproveitar resultados antigos
+VERSAO_RFV = 1
+
+# Tamanho (em bytes) a partir do qual CSVs são agregados pelo Polars em vez do pandas
+LIMITE_POLARS = 50_000_000
+
+# Quantidade de linhas exibidas na visualização das compras para arquivos acima desse limite
+LINHAS_AMOSTRA = 1_000
+
+
+def hash_dataframe(df):
+    # Hash completo do conteúdo do DataFrame (o hash padrão do Streamlit amostra tabelas grandes)
+    return (
+        df.shape,
+        tuple(df.columns),
+        pd.util.hash_pandas_object(df, index=True).values.tobytes(),
+    )
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: hash_dataframe})
 def df_to_excel(df):
+    # Os bytes do Excel ficam em cache, evitando serializar de novo um DataFrame inalterado
     output = BytesIO()
     writer = pd.ExcelWriter(output, engine="xlsxwriter")
     df.to_excel(writer, index=False, sheet_name="Sheet1")
@@ -38,33 +72,261 @@ def df_to_excel(df):
     return processed_data
 
 
-def recencia_class(x, r, q_dict):
-    if x <= q_dict[r][0.25]:
-        return "A"
-    elif x <= q_dict[r][0.5]:
-        return "B"
-    elif x <= q_dict[r][0.75]:
-        return "C"
+def classifica_quartis(valores, quartis, inverte=False):
+    # Busca binária sobre os limites (25%, 50%, 75%): valores <= limite caem no quartil inferior
+    codigos = np.searchsorted(quartis, valores, side="left").astype(np.int8)
+    if inverte:
+        # Para frequência e valor, os maiores valores recebem a classe 'A'
+        codigos = 3 - codigos
+    return pd.Categorical.from_codes(codigos, categories=list("ABCD"), ordered=True)
+
+
+def tres_quartis(valores):
+    # Quartis 25%, 50% e 75% por seleção parcial (np.partition), sem ordenar a coluna inteira;
+    # mantém a interpolação linear usada por DataFrame.quantile
+    n = valores.size
+    if n == 0:
+        return np.full(3, np.nan)
+    posicoes = (n - 1) * np.array([0.25, 0.5, 0.75])
+    inferiores = np.floor(posicoes).astype(np.intp)
+    superiores = np.minimum(inferiores + 1, n - 1)
+    parcial = np.partition(valores, np.union1d(inferiores, superiores))
+    base = parcial[inferiores].astype(np.float64)
+    return base + (posicoes - inferiores) * (parcial[superiores] - base)
+
+
+def reduz_id_cliente(ids):
+    # IDs inteiros que cabem em 32 bits são reduzidos para int32; IDs textuais viram categoria
+    if pd.api.types.is_integer_dtype(ids):
+        info = np.iinfo(np.int32)
+        if len(ids) == 0 or (ids.min() >= info.min and ids.max() <= info.max):
+            return ids.astype(np.int32)
+        return ids
+    if pd.api.types.is_object_dtype(ids) or pd.api.types.is_string_dtype(ids):
+        return ids.astype("category")
+    return ids
+
+
+# Colunas do arquivo de compras usadas no cálculo do RFV e seus tipos na leitura
+# (ID_cliente é reduzido depois por reduz_id_cliente, conforme seja numérico ou texto;
+# CodigoCompra só é contado, então mantém o tipo inferido e pode ter códigos vazios)
+COLUNAS_COMPRAS = ["ID_cliente", "DiaCompra", "CodigoCompra", "ValorTotal"]
+TIPOS_COMPRAS = {"ValorTotal": np.float32}
+
+
+@st.cache_data(show_spinner=False)
+def le_compras(file_bytes, nome_arquivo, linhas=None):
+    # Lê apenas as colunas necessárias do arquivo enviado, conforme a extensão,
+    # convertendo a coluna 'DiaCompra' para datetime; com `linhas`, lê só o início do arquivo
+    if nome_arquivo.lower().endswith(".xlsx"):
+        # Planilhas XLSX são lidas com o leitor calamine (Rust), mais rápido que o openpyxl
+        df_compras = pd.read_excel(
+            BytesIO(file_bytes),
+            engine="calamine",
+            nrows=linhas,
+            parse_dates=["DiaCompra"],
+            usecols=COLUNAS_COMPRAS,
+            dtype=TIPOS_COMPRAS,
+        )
+    elif linhas is not None:
+        # Amostra de CSV: o parser C do pandas (o do PyArrow não aceita nrows) para após `linhas`
+        df_compras = pd.read_csv(
+            BytesIO(file_bytes),
+            nrows=linhas,
+            dtype_backend="pyarrow",
+            parse_dates=["DiaCompra"],
+            usecols=COLUNAS_COMPRAS,
+            dtype=TIPOS_COMPRAS,
+        )
     else:
-        return "D"
+        # Arquivos CSV são lidos pelo parser multithread do PyArrow, com colunas Arrow
+        df_compras = pd.read_csv(
+            BytesIO(file_bytes),
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            parse_dates=["DiaCompra"],
+            usecols=COLUNAS_COMPRAS,
+            dtype=TIPOS_COMPRAS,
+        )
+    return df_compras
 
 
-def frequencia_class(x, f, q_dict):
-    if x <= q_dict[f][0.25]:
-        return "D"
-    elif x <= q_dict[f][0.5]:
-        return "C"
-    elif x <= q_dict[f][0.75]:
-        return "B"
-    else:
-        return "A"
+def agrega_compras(df_compras):
+    # Reduz a chave de agrupamento (int32 ou categoria) antes do groupby
+    df_compras["ID_cliente"] = reduz_id_cliente(df_compras["ID_cliente"])
 
+    # Ordena as compras por cliente uma vez, deixando cada grupo contíguo na memória
+    df_compras.sort_values("ID_cliente", kind="stable", inplace=True)
 
-def selecao_valores_categoricos(relatorio, col, selecionados, verificacao):
-    if verificacao == True:
-        return relatorio
-    else:
-        return relatorio.loc[relatorio[col] == selecionados].reset_index(drop=True)
+    # Agrupa por cliente uma única vez, obtendo a data da última compra,
+    # a frequência (quantidade de compras) e o valor (soma gasta) de cada um
+    return df_compras.groupby("ID_cliente", sort=False, observed=True).agg(
+        DiaUltimaCompra=("DiaCompra", "max"),
+        Frequencia=("CodigoCompra", "count"),
+        Valor=("ValorTotal", "sum"),
+    )
+
+
+def agrega_compras_polars(file_bytes):
+    # Mesma agregação de agrega_compras, feita pelo Polars em várias threads para CSVs grandes;
+    # apenas a tabela agregada (uma linha por cliente) é convertida para pandas
+    df_compras = pl.read_csv(
+        BytesIO(file_bytes),
+        columns=COLUNAS_COMPRAS,
+        schema_overrides={"ValorTotal": pl.Float32},
+        try_parse_dates=True,
+    )
+
+    # O Polars só reconhece datas ISO; nos demais formatos a coluna é convertida
+    # com pd.to_datetime, como faz a leitura do pandas
+    if not df_compras.schema["DiaCompra"].is_temporal():
+        df_compras = df_compras.with_columns(
+            pl.from_pandas(
+                pd.to_datetime(df_compras.get_column("DiaCompra").to_pandas())
+            ).alias("DiaCompra")
+        )
+
+    df_agregado = (
+        df_compras.group_by("ID_cliente")
+        .agg(
+            pl.col("DiaCompra").max().alias("DiaUltimaCompra"),
+            pl.col("CodigoCompra").count().alias("Frequencia"),
+            pl.col("ValorTotal").sum().alias("Valor"),
+        )
+        .sort("ID_cliente")
+        .to_pandas()
+        .set_index("ID_cliente")
+    )
+    df_agregado.index = reduz_id_cliente(df_agregado.index)
+    return df_agregado
+
+
+def monta_rfv(df_RFV):
+    # Define o dia atual como o dia seguinte à última compra registrada
+    dia_atual = df_RFV["DiaUltimaCompra"].max() + pd.Timedelta(days=1)
+
+    # Calcula a recência: quantos dias desde a última compra de cada cliente
+    df_RFV.insert(
+        0,
+        "Recencia",
+        (dia_atual - df_RFV["DiaUltimaCompra"]).dt.days,
+    )
+
+    # Remove a coluna de data da última compra, pois não será mais usada
+    df_RFV.drop("DiaUltimaCompra", axis=1, inplace=True)
+
+    # Reduz os tipos numéricos para diminuir a memória percorrida nas etapas seguintes
+    df_RFV = df_RFV.astype(
+        {"Recencia": np.int32, "Frequencia": np.int32, "Valor": np.float32}
+    )
+
+    # Calcula os quartis (25%, 50%, 75%) para as colunas Recencia, Frequencia e Valor
+    # (pd.qcut não é usado pois falha quando há limites repetidos, comum na frequência)
+    quartis = {
+        coluna: tres_quartis(df_RFV[coluna].to_numpy())
+        for coluna in ["Recencia", "Frequencia", "Valor"]
+    }
+
+    # Classifica a recência de cada cliente em quartis (A, B, C, D); menor recência é melhor
+    df_RFV["R_quartil"] = classifica_quartis(
+        df_RFV["Recencia"].values, quartis["Recencia"]
+    )
+
+    # Classifica a frequência de cada cliente em quartis (A, B, C, D); maior frequência é melhor
+    df_RFV["F_quartil"] = classifica_quartis(
+        df_RFV["Frequencia"].values, quartis["Frequencia"], inverte=True
+    )
+
+    # Classifica o valor gasto de cada cliente em quartis (A, B, C, D); maior valor é melhor
+    df_RFV["V_quartil"] = classifica_quartis(
+        df_RFV["Valor"].values, quartis["Valor"], inverte=True
+    )
+
+    return df_RFV
+
+
+@st.cache_data(show_spinner=False)
+def calcula_rfv(file_bytes, nome_arquivo):
+    # O resultado fica em cache pelo conteúdo do arquivo, evitando recalcular a cada interação.
+    # Entre sessões, a tabela RFV é reaproveitada de um arquivo parquet salvo em disco
+    chave = hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+    caminho_cache = PASTA_CACHE_RFV / f"v{VERSAO_RFV}-{chave}.parquet"
+
+    df_RFV = None
+    if caminho_cache.exists():
+        try:
+            df_RFV = pd.read_parquet(caminho_cache)
+        except (OSError, ValueError):
+            # Arquivo de cache corrompido ou incompleto: a tabela é recalculada e regravada
+            df_RFV = None
+
+    if df_RFV is None:
+        if (
+            pl is not None
+            and not nome_arquivo.lower().endswith(".xlsx")
+            and len(file_bytes) > LIMITE_POLARS
+        ):
+            df_agregado = agrega_compras_polars(file_bytes)
+        else:
+            df_agregado = agrega_compras(le_compras(file_bytes, nome_arquivo))
+        df_RFV = monta_rfv(df_agregado)
+        try:
+            # Grava em um arquivo temporário e o move para o destino, para que outra
+            # sessão nunca leia um parquet escrito pela metade
+            PASTA_CACHE_RFV.mkdir(exist_ok=True)
+            descritor, caminho_temporario = tempfile.mkstemp(
+                dir=PASTA_CACHE_RFV, suffix=".tmp"
+            )
+            os.close(descritor)
+            try:
+                df_RFV.to_parquet(caminho_temporario, compression="zstd")
+                os.replace(caminho_temporario, caminho_cache)
+            finally:
+                if os.path.exists(caminho_temporario):
+                    os.remove(caminho_temporario)
+        except OSError:
+            # Sem permissão de escrita o cache em disco é apenas ignorado
+            pass
+
+    # Conta os clientes de cada combinação de quartis, permitindo identificar seleções vazias
+    tamanhos = df_RFV.groupby(
+        ["R_quartil", "F_quartil", "V_quartil"], observed=True
+    ).size()
+
+    return df_RFV, tamanhos
+
+
+# Todos os 64 RFV Scores possíveis, na ordem dos códigos (R * 16 + F * 4 + V) dos quartis
+RFV_SCORES = np.array([r + f + v for r in "ABCD" for f in "ABCD" for v in "ABCD"])
+
+
+def rfv_score(df):
+    # Compõe o RFV Score a partir dos códigos inteiros das categorias, sem concatenar strings
+    codigos = (
+        df["R_quartil"].cat.codes.values * 16
+        + df["F_quartil"].cat.codes.values * 4
+        + df["V_quartil"].cat.codes.values
+    )
+    return pd.DataFrame({"RFV Score": RFV_SCORES[codigos]}, index=df.index)
+
+
+def injeta_css():
+    # Fonte e estilos dos títulos definidos em um único bloco, referenciado pelas classes rfv-*
+    st.markdown(
+        """
+        <link href="https://fonts.googleapis.com/css2?family=Kantumruy+Pro&display=swap" rel="stylesheet">
+        <style>
+        .rfv-title, .rfv-subtitle, .rfv-shape {
+            text-align: center;
+            font-family: "Kantumruy Pro", sans-serif;
+        }
+        .rfv-title { font-size: 2.5em; }
+        .rfv-subtitle { font-size: 1.5em; }
+        .rfv-shape { font-size: 0.8em; }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
 
 
 def main():
@@ -81,11 +343,11 @@ main()
 if "comentarios_rfv" not in st.session_state:
     st.session_state["comentarios_rfv"] = {}
 
+injeta_css()
+
 st.markdown(
     """
-    <link href="https://fonts.googleapis.com/css2?family=Kantumruy+Pro&display=swap" rel="stylesheet">
-
-    <h1 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 2.5em;'>
+    <h1 class='rfv-title'>
         <strong>Definição de conjunto de clientes RFV</strong>
     </h1>
     """,
@@ -118,11 +380,7 @@ uploaded_file = st.sidebar.file_uploader(
 # - uploaded_file: Arquivo de compras enviado pelo usuário via interface Streamlit. Aceita arquivos nos formatos CSV e XLSX.
 # - df_compras: DataFrame contendo os dados de compras lidos do arquivo enviado. Espera-se que contenha as colunas 'ID_cliente', 'DiaCompra', 'CodigoCompra' e 'ValorTotal'.
 # - dia_atual: Data de referência para cálculo da recência, definida como o dia seguinte à última compra registrada no dataset.
-# - df_recencia: DataFrame com o ID do cliente e a data da última compra de cada cliente.
-# - df_frequencia: DataFrame com o ID do cliente e a quantidade de compras realizadas (frequência).
-# - df_valor: DataFrame com o ID do cliente e o valor total gasto (soma dos valores das compras).
-# - df_RF: DataFrame intermediário contendo recência e frequência por cliente.
-# - df_RFV: DataFrame final contendo recência, frequência e valor por cliente, indexado pelo ID do cliente.
+# - df_RFV: DataFrame contendo recência, frequência e valor por cliente, indexado pelo ID do cliente, obtido com uma única agregação sobre df_compras.
 # O script espera que o arquivo de entrada possua as seguintes colunas:
 # - 'ID_cliente': Identificador único do cliente.
 # - 'DiaCompra': Data da compra (deve ser convertível para datetime).
@@ -132,12 +390,8 @@ uploaded_file = st.sidebar.file_uploader(
 
 # Verifica se um arquivo foi enviado pelo usuário
 if uploaded_file is not None:
-    # Lê o arquivo CSV enviado, convertendo a coluna 'DiaCompra' para o tipo datetime automaticamente
-    df_compras = pd.read_csv(
-        uploaded_file,
-        infer_datetime_format=True,
-        parse_dates=["DiaCompra"],
-    )
+    # Obtém o conteúdo do arquivo; leitura e cálculo do RFV ficam em cache por esse conteúdo
+    file_bytes = uploaded_file.getvalue()
 
     dados_compras = st.checkbox(
         "Exibir dados do arquivo de compras",
@@ -147,91 +401,40 @@ if uploaded_file is not None:
 
     # Adiciona uma linha divisória e um título para a visualização dos dados
     if dados_compras == True:
+        # A leitura das compras só é necessária para a visualização; em arquivos grandes
+        # apenas as primeiras linhas são lidas, sem repetir a leitura completa do cálculo
+        arquivo_grande = len(file_bytes) > LIMITE_POLARS
+        df_compras = le_compras(
+            file_bytes,
+            uploaded_file.name,
+            linhas=LINHAS_AMOSTRA if arquivo_grande else None,
+        )
+
         st.markdown("---")
         st.markdown(
             """
-        <h2 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 1.5em;'>Visualização dos dados de compras</h2>
+        <h2 class='rfv-subtitle'>Visualização dos dados de compras</h2>
         """,
             unsafe_allow_html=True,
         )
 
         st.markdown(
             f"""
-        <h3 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 0.8em;'>{df_compras.shape}</h3>
+        <h3 class='rfv-shape'>{df_compras.shape}</h3>
         """,
             unsafe_allow_html=True,
         )
 
+        if arquivo_grande:
+            st.caption(
+                f"Arquivo grande: exibindo apenas as primeiras {LINHAS_AMOSTRA} linhas."
+            )
+
         # Exibe as primeiras linhas do DataFrame de compras para conferência
         st.dataframe(df_compras, use_container_width=True, height=250)
 
-    # Obtém as datas mínima e máxima das compras
-    data_minima = df_compras["DiaCompra"].min()
-    data_maxima = df_compras["DiaCompra"].max()
-
-    # Define o dia atual como o dia seguinte à última compra registrada
-    dia_atual = df_compras["DiaCompra"].max() + pd.Timedelta(days=1)
-
-    # Agrupa por cliente e pega a data da última compra de cada um
-    df_recencia = df_compras.groupby(by="ID_cliente", as_index=False)["DiaCompra"].max()
-    df_recencia.columns = ["ID_cliente", "DiaUltimaCompra"]
-
-    # Calcula a recência: quantos dias desde a última compra de cada cliente
-    df_recencia["Recencia"] = df_recencia["DiaUltimaCompra"].apply(
-        lambda x: (dia_atual - x).days
-    )
-
-    # Atualiza o dia atual (opcional, pois já foi feito acima)
-    dia_atual = df_compras["DiaCompra"].max() + pd.Timedelta(days=1)
-
-    # Remove a coluna de data da última compra, pois não será mais usada
-    df_recencia.drop("DiaUltimaCompra", axis=1, inplace=True)
-
-    # Calcula a frequência: quantidade de compras por cliente
-    df_frequencia = (
-        df_compras[["ID_cliente", "CodigoCompra"]]
-        .groupby("ID_cliente")
-        .count()
-        .reset_index()
-    )
-    df_frequencia.columns = ["ID_cliente", "Frequencia"]
-
-    # Calcula o valor: soma do valor gasto por cliente
-    df_valor = (
-        df_compras[["ID_cliente", "ValorTotal"]]
-        .groupby("ID_cliente")
-        .sum()
-        .reset_index()
-    )
-    df_valor.columns = ["ID_cliente", "Valor"]
-
-    # Junta as tabelas de recência e frequência
-    df_RF = df_recencia.merge(df_frequencia, on="ID_cliente")
-
-    # Junta a tabela anterior com o valor, formando a tabela RFV final
-    df_RFV = df_RF.merge(df_valor, on="ID_cliente")
-
-    # Define o índice da tabela como o ID do cliente
-    df_RFV.set_index("ID_cliente", inplace=True)
-
-    # Calcula os quartis (25%, 50%, 75%) para as colunas Recencia, Frequencia e Valor
-    quartis = df_RFV.quantile([0.25, 0.5, 0.75])
-    quartis.to_dict()  # Converte os quartis para um dicionário
-
-    # Classifica a recência de cada cliente em quartis (A, B, C, D)
-    df_RFV["R_quartil"] = df_RFV["Recencia"].apply(
-        recencia_class, args=("Recencia", quartis)
-    )
-
-    # Classifica a frequência de cada cliente em quartis (A, B, C, D)
-    df_RFV["F_quartil"] = df_RFV["Frequencia"].apply(
-        frequencia_class, args=("Frequencia", quartis)
-    )
-
-    # Classifica o valor gasto de cada cliente em quartis (A, B, C, D)
-    df_RFV["V_quartil"] = df_RFV["Valor"].apply(
-        frequencia_class, args=("Valor", quartis)
-    )
+    # Calcula a tabela RFV (recência, frequência, valor e quartis) por cliente
+    df_RFV, tamanhos = calcula_rfv(file_bytes, uploaded_file.name)
 
     # Cria um seletor na barra lateral para escolher a classe de recência ('A', 'B', 'C', 'D')
     selecao_recencia = st.sidebar.selectbox(
@@ -257,130 +460,129 @@ if uploaded_file is not None:
         help="Selecione a classe da característica valor para filtrar os clientes. 'A' representa os clientes que mais gastaram.",
     )
 
-    # Aplica o filtro usando a função selecao_valores_categoricos para as colunas de recência, frequência e valor
-    df_RFV1 = (
-        df_RFV.pipe(
-            selecao_valores_categoricos,
-            col="R_quartil",
-            selecionados=selecao_recencia,
-            verificacao=False,
-        )
-        .pipe(
-            selecao_valores_categoricos,
-            col="F_quartil",
-            selecionados=selecao_frequencia,
-            verificacao=False,
-        )
-        .pipe(
-            selecao_valores_categoricos,
-            col="V_quartil",
-            selecionados=selecao_valor,
-            verificacao=False,
-        )
-    )
-
     # Cria uma checkbox na barra lateral para exibir a tabela RFV filtrada
     if st.sidebar.checkbox(
         "Exibir tabela RFV filtrada",
         value=True,
         help="Marque para visualizar a tabela RFV filtrada pelos critérios selecionados.",
     ):
+        # O filtro só é aplicado quando o painel da tabela filtrada está visível;
+        # a quantidade de clientes do perfil vem das contagens pré-calculadas
+        total_selecao = tamanhos.get(
+            (selecao_recencia, selecao_frequencia, selecao_valor), 0
+        )
+
+        if total_selecao == 0:
+            # Perfil sem clientes: evita percorrer a tabela para aplicar o filtro
+            df_RFV1 = df_RFV.iloc[:0].reset_index(drop=True)
+        else:
+            # Filtra os clientes com uma única máscara booleana sobre as colunas de recência, frequência e valor
+            mask = (
+                (df_RFV["R_quartil"].values == selecao_recencia)
+                & (df_RFV["F_quartil"].values == selecao_frequencia)
+                & (df_RFV["V_quartil"].values == selecao_valor)
+            )
+            df_RFV1 = df_RFV.loc[mask].reset_index(drop=True)
+
         # Exibe a tabela RFV filtrada conforme os critérios escolhidos
         st.markdown("---")
         st.markdown(
             """
-        <h2 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 1.5em;'>Tabela RFV Filtrada</h2>
+        <h2 class='rfv-subtitle'>Tabela RFV Filtrada</h2>
         """,
             unsafe_allow_html=True,
         )
         st.markdown(
             f"""
-        <h3 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 0.8em;'>{df_RFV1.shape}</h3>
+        <h3 class='rfv-shape'>{df_RFV1.shape}</h3>
         """,
             unsafe_allow_html=True,
         )
-        st.dataframe(df_RFV1, use_container_width=True, height=250)
-
-        df_xlsx = df_RFV1.pipe(df_to_excel)
-        st.sidebar.download_button(
-            label="🟢⬇️ Faça o download do Dataframe RFV filtrado em excel",
-            data=df_xlsx,
-            file_name="dados_filtrados.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
-
-        st.markdown("---")
-
-        st.markdown(
-            """
-        <h2 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 1.5em;'>Estratégia de marketing</h2>
-        """,
-            unsafe_allow_html=True,
-        )
-
-        df_marketing_strategy1 = (
-            df_RFV1["R_quartil"] + df_RFV1["F_quartil"] + df_RFV1["V_quartil"]
-        )
-        df_marketing_strategy1 = pd.DataFrame(
-            df_marketing_strategy1, columns=["RFV Score"]
-        )
-
-        # Aplica os comentários salvos para cada RFV Score
-        df_marketing_strategy1["Comentário"] = df_marketing_strategy1["RFV Score"].map(
-            lambda x: st.session_state["comentarios_rfv"].get(x, "")
-        )
-
-        # Cria o RFV Score atual com base nos filtros selecionados
-        rfv_score_atual = selecao_recencia + selecao_frequencia + selecao_valor
-
-        # Campo de texto com valor recuperado do session_state se existir
-        comentario_input = st.text_input(
-            f"Comentário para o perfil {rfv_score_atual}:",
-            value=st.session_state["comentarios_rfv"].get(rfv_score_atual, ""),
-            key="comentario_atual",
-        )
-
-        col1, col2 = st.columns([1, 1])
-        submit_button = col1.button("Enviar Comentário")
-        erase_button = col2.button("Limpar Comentário")
-
-        # Atualiza ou limpa o comentário no session_state
-        if submit_button:
-            st.session_state["comentarios_rfv"][rfv_score_atual] = comentario_input
-            st.success("Comentário enviado com sucesso!")
-
-        elif erase_button:
-            st.session_state["comentarios_rfv"].pop(rfv_score_atual, None)
-            st.success("Comentário apagado com sucesso!")
-
-        st.dataframe(df_marketing_strategy1, use_container_width=True, height=250)
-
-        df_estrategias = df_RFV1[["Recencia", "Frequencia", "Valor"]].copy()
-        df_estrategias["RFV Score"] = df_marketing_strategy1["RFV Score"]
-        df_estrategias["Sugestão de estratégia"] = df_marketing_strategy1["Comentário"]
-
-        df_xlsx2 = df_estrategias.pipe(df_to_excel)
-
-        download_button = st.download_button(
-            "🟢⬇️ Faça o download do Dataframe RFV filtrado com estratégia de marketing em excel",
-            key="download_marketing_strategy",
-            data=df_xlsx2,
-            file_name="dados_filtrados_marketing.xlsx",
-            help="Clique para baixar o DataFrame RFV filtrado com a estratégia de marketing em formato Excel.",
-        )
+        if total_selecao == 0:
+            # Nenhum cliente no perfil: não há tabela, estratégia ou Excel a gerar
+            st.info("Nenhum cliente encontrado para o perfil RFV selecionado.")
+        else:
+            st.dataframe(df_RFV1, use_container_width=True, height=250)
+
+            df_xlsx = df_RFV1.pipe(df_to_excel)
+            st.sidebar.download_button(
+                label="🟢⬇️ Faça o download do Dataframe RFV filtrado em excel",
+                data=df_xlsx,
+                file_name="dados_filtrados.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+
+            st.markdown("---")
+
+            st.markdown(
+                """
+            <h2 class='rfv-subtitle'>Estratégia de marketing</h2>
+            """,
+                unsafe_allow_html=True,
+            )
+
+            df_marketing_strategy1 = rfv_score(df_RFV1)
+
+            # Aplica os comentários salvos para cada RFV Score
+            df_marketing_strategy1["Comentário"] = (
+                df_marketing_strategy1["RFV Score"]
+                .map(st.session_state["comentarios_rfv"])
+                .fillna("")
+            )
+
+            # Cria o RFV Score atual com base nos filtros selecionados
+            rfv_score_atual = selecao_recencia + selecao_frequencia + selecao_valor
+
+            # Campo de texto com valor recuperado do session_state se existir
+            comentario_input = st.text_input(
+                f"Comentário para o perfil {rfv_score_atual}:",
+                value=st.session_state["comentarios_rfv"].get(rfv_score_atual, ""),
+                key="comentario_atual",
+            )
+
+            col1, col2 = st.columns([1, 1])
+            submit_button = col1.button("Enviar Comentário")
+            erase_button = col2.button("Limpar Comentário")
+
+            # Atualiza ou limpa o comentário no session_state
+            if submit_button:
+                st.session_state["comentarios_rfv"][rfv_score_atual] = comentario_input
+                st.success("Comentário enviado com sucesso!")
+
+            elif erase_button:
+                st.session_state["comentarios_rfv"].pop(rfv_score_atual, None)
+                st.success("Comentário apagado com sucesso!")
+
+            st.dataframe(df_marketing_strategy1, use_container_width=True, height=250)
+
+            df_estrategias = df_RFV1[["Recencia", "Frequencia", "Valor"]].copy()
+            df_estrategias["RFV Score"] = df_marketing_strategy1["RFV Score"]
+            df_estrategias["Sugestão de estratégia"] = df_marketing_strategy1[
+                "Comentário"
+            ]
+
+            df_xlsx2 = df_estrategias.pipe(df_to_excel)
+
+            download_button = st.download_button(
+                "🟢⬇️ Faça o download do Dataframe RFV filtrado com estratégia de marketing em excel",
+                key="download_marketing_strategy",
+                data=df_xlsx2,
+                file_name="dados_filtrados_marketing.xlsx",
+                help="Clique para baixar o DataFrame RFV filtrado com a estratégia de marketing em formato Excel.",
+            )
 
     else:
         # Caso a checkbox não esteja marcada, exibe a tabela RFV completa (sem filtros)
         st.markdown("---")
         st.markdown(
             """
-        <h2 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 1.5em;'>Tabela RFV Completa</h2>
+        <h2 class='rfv-subtitle'>Tabela RFV Completa</h2>
         """,
             unsafe_allow_html=True,
         )
         st.markdown(
             f"""
-        <h3 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 0.8em;'>{df_RFV.shape}</h3>
+        <h3 class='rfv-shape'>{df_RFV.shape}</h3>
         """,
             unsafe_allow_html=True,
         )
@@ -398,23 +600,17 @@ if uploaded_file is not None:
 
         st.markdown(
             """
-        <h2 style='text-align: center; font-family: "Kantumruy Pro", sans-serif; font-size: 1.5em;'>Estratégia de marketing</h2>
+        <h2 class='rfv-subtitle'>Estratégia de marketing</h2>
         """,
             unsafe_allow_html=True,
         )
 
-        df_marketing_strategy = (
-            df_RFV["R_quartil"] + df_RFV["F_quartil"] + df_RFV["V_quartil"]
-        )
-        df_marketing_strategy = pd.DataFrame(
-            df_marketing_strategy, columns=["RFV Score"]
-        )
-        df_marketing_strategy["Comentário"] = df_marketing_strategy["RFV Score"].map(
-            lambda x: st.session_state["comentarios_rfv"].get(x, "")
-        )
-
-        df_marketing_strategy["Comentário"] = df_marketing_strategy["RFV Score"].apply(
-            lambda x: st.session_state["comentarios_rfv"].get(x, "")
+        df_marketing_strategy = rfv_score(df_RFV)
+        # Aplica os comentários salvos para cada RFV Score
+        df_marketing_strategy["Comentário"] = (
+            df_marketing_strategy["RFV Score"]
+            .map(st.session_state["comentarios_rfv"])
+            .fillna("")
         )
 
         st.dataframe(df_marketing_strategy, use_container_width=True, height=250)